@@ -1,58 +1,417 @@
 import requests
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
 from datetime import datetime
 import pandas as pd
-from typing import List, Dict, Any
-import base64
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple
 import argparse
+import csv
+import hashlib
+import json
+import queue
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pprint import pprint
 
+# Repositories are audited concurrently; each one costs several API round-trips.
+MAX_WORKERS = 16
+
+# Start spacing out requests once fewer than this many remain in the
+# rate-limit window, and give up after this many rate-limited retries
+RATE_LIMIT_THRESHOLD = 10
+MAX_RATE_LIMIT_RETRIES = 5
+# GitHub asks clients to wait at least a minute after a 429 that says nothing
+# about when to retry
+SECONDARY_RATE_LIMIT_WAIT = 60
+
+# On-disk HTTP cache shared by consecutive runs; GitHub sends ETags, so
+# expired entries are revalidated with cheap conditional requests. Cache keys
+# leave out the Authorization header, so each token gets its own database,
+# named after a hash of the token rather than the token itself
+CACHE_NAME = '.gh_audit_cache'
+CACHE_EXPIRE_AFTER = 3600
+
+# Lists a page of organization repositories together with their workflow
+# files, so the audit doesn't need a contents request per repository.
+REPOSITORIES_QUERY = '''
+query($org: String!, $cursor: String, $withContents: Boolean!) {
+  organization(login: $org) {
+    repositories(first: 100, after: $cursor) {
+      pageInfo {
+        hasNextPage
+        endCursor
+      }
+      nodes {
+        name
+        isPrivate
+        isArchived
+        isDisabled
+        isFork
+        createdAt
+        updatedAt
+        pushedAt
+        url
+        defaultBranchRef {
+          name
+        }
+        workflows: object(expression: "HEAD:.github/workflows") {
+          ... on Tree {
+            entries {
+              name
+              object @include(if: $withContents) {
+                ... on Blob {
+                  text
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+'''
+
+# Columns of the audit report, in CSV order
+RESULT_COLUMNS = [
+    'repository',
+    'visibility',
+    'archived',
+    'disabled',
+    'fork',
+    'fork_workflow_status',
+    'created_at',
+    'updated_at',
+    'actions_enabled',
+    'actions_status',
+    'allowed_actions',
+    'default_workflow_permissions',
+    'can_approve_pull_request_reviews',
+    'workflow_count',
+    'workflow_files',
+    'default_branch',
+    'url',
+]
+
+RESULT_DTYPES = {
+    'archived': 'bool',
+    'disabled': 'bool',
+    'fork': 'bool',
+    'workflow_count': 'int32',
+}
+
+
+def cache_name(token: str) -> str:
+    """Return the HTTP cache database name for a token."""
+    return f"{CACHE_NAME}_{hashlib.sha256(token.encode()).hexdigest()[:16]}"
+
+
+def state_path(csv_path: str) -> str:
+    """Return the path of the state sidecar written next to an audit CSV."""
+    return os.path.splitext(csv_path)[0] + '.state.json'
+
+
+def is_workflow_file(name: str, content: Optional[str] = None) -> bool:
+    """Check whether a file from .github/workflows looks like a workflow.
+
+    Only the file name is checked unless the content is given.
+    """
+    if not name.endswith(('.yml', '.yaml')):
+        return False
+    return content is None or 'on:' in content or 'jobs:' in content
+
+
+class SerializedSQLiteCache(requests_cache.SQLiteCache):
+    """SQLite cache backend that can be shared by the audit worker threads.
+
+    requests-cache shares one sqlite3 connection between threads and only
+    serializes writes, which fails under concurrent reads; every cache
+    operation made by a request is serialized here instead.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.RLock()
+
+    def get_response(self, *args, **kwargs):
+        with self._lock:
+            return super().get_response(*args, **kwargs)
+
+    def save_response(self, *args, **kwargs):
+        with self._lock:
+            return super().save_response(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with self._lock:
+            return super().delete(*args, **kwargs)
+
+
+class PrefetchingPaginator:
+    """Iterate over paginated results while fetching the next pages in the background.
+
+    fetch_page receives a cursor (None for the first page) and returns the
+    page's items together with the cursor of the next page, or None when
+    it was the last one. Up to `prefetch` pages are fetched ahead of the
+    consumer.
+    """
+
+    _DONE = object()
+
+    def __init__(self, fetch_page: Callable[[Optional[str]], Tuple[List[Any], Optional[str]]],
+                 prefetch: int = 2):
+        self.fetch_page = fetch_page
+        self.prefetch = prefetch
+
+    def __iter__(self) -> Iterator[Any]:
+        pages = queue.Queue(maxsize=self.prefetch)
+        stopped = threading.Event()
+        producer = threading.Thread(
+            target=self._produce, args=(pages, stopped), daemon=True)
+        producer.start()
+        try:
+            while True:
+                page = pages.get()
+                if page is self._DONE:
+                    return
+                if isinstance(page, Exception):
+                    raise page
+                yield from page
+        finally:
+            stopped.set()
+
+    def _produce(self, pages: queue.Queue, stopped: threading.Event) -> None:
+        try:
+            cursor = None
+            while True:
+                items, cursor = self.fetch_page(cursor)
+                if not self._put(pages, stopped, items) or cursor is None:
+                    break
+            self._put(pages, stopped, self._DONE)
+        except Exception as e:
+            self._put(pages, stopped, e)
+
+    @staticmethod
+    def _put(pages: queue.Queue, stopped: threading.Event, item: Any) -> bool:
+        """Queue an item, giving up if the consumer stops iterating."""
+        while not stopped.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
 
 class GitHubActionsAudit:
-    def __init__(self, token: str, org: str):
+    def __init__(self, token: str, org: str, max_workers: int = MAX_WORKERS,
+                 verify_contents: bool = False, cache: bool = True):
         self.token = token
         self.org = org
+        self.max_workers = max_workers
+        self.verify_contents = verify_contents
+        self._print_lock = threading.Lock()
+        # Rows and repository timestamps of a previous audit, and the
+        # timestamps seen by this one
+        self.previous_rows: Dict[str, Dict[str, Any]] = {}
+        self.previous_state: Dict[str, List[Optional[str]]] = {}
+        self.state: Dict[str, List[Optional[str]]] = {}
         self.headers = {
             'Authorization': f'token {token}',
             'Accept': 'application/vnd.github.v3+json'
         }
         self.base_url = 'https://api.github.com'
 
+        # One keep-alive pool shared by all workers instead of a new TLS
+        # connection per request; sized so no worker waits on a connection
+        pool_size = max(32, max_workers)
+        if cache:
+            self.session = requests_cache.CachedSession(
+                backend=SerializedSQLiteCache(cache_name(token)), cache_control=True,
+                expire_after=CACHE_EXPIRE_AFTER)
+        else:
+            self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            # Server errors only; _request handles rate limits (403/429) and
+            # their Retry-After, which urllib3 would otherwise retry on too
+            max_retries=Retry(total=5, backoff_factor=0.5,
+                              status_forcelist=[502, 503, 504],
+                              respect_retry_after_header=False,
+                              raise_on_status=False)))
+
+    def __enter__(self) -> 'GitHubActionsAudit':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying HTTP session."""
+        self.session.close()
+
+    def load_previous(self, csv_path: str) -> bool:
+        """Load a previous audit so unchanged repositories can reuse its rows.
+
+        Returns False, leaving nothing loaded, when the CSV has no state file
+        (e.g. it was written before state files existed).
+        """
+        try:
+            with open(state_path(csv_path)) as fh:
+                self.previous_state = json.load(fh)
+        except FileNotFoundError:
+            print(f"Warning: {state_path(csv_path)} not found; auditing all repositories")
+            return False
+        with open(csv_path, newline='') as fh:
+            for row in csv.DictReader(fh):
+                for name, dtype in RESULT_DTYPES.items():
+                    row[name] = row[name] == 'True' if dtype == 'bool' else int(row[name])
+                self.previous_rows[row['repository']] = row
+        return True
+
+    def save_state(self, csv_path: str) -> None:
+        """Write the repository timestamps seen by this audit next to its CSV."""
+        with open(state_path(csv_path), 'w') as fh:
+            json.dump(self.state, fh, indent=2, sort_keys=True)
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request, waiting out GitHub rate limits instead of failing."""
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            response = self.session.request(method, url, **kwargs)
+            # Cached responses carry the rate-limit headers of their original request
+            if getattr(response, 'from_cache', False):
+                return response
+
+            wait = self._rate_limit_wait(response)
+            if wait is None:
+                break
+            if attempt == MAX_RATE_LIMIT_RETRIES:
+                return response
+
+            wait += random.uniform(0, 0.1 * 2 ** attempt)
+            with self._print_lock:
+                print(f"Rate limited by GitHub, retrying in {wait:.1f}s")
+            time.sleep(wait)
+
+        # Spread the remaining budget over the time left in the window
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset = response.headers.get('X-RateLimit-Reset')
+        if remaining is not None and reset is not None and int(remaining) < RATE_LIMIT_THRESHOLD:
+            time.sleep(max(0, int(reset) - time.time()) / max(int(remaining), 1))
+
+        return response
+
+    @staticmethod
+    def _rate_limit_wait(response: requests.Response) -> Optional[float]:
+        """Return how long to wait before retrying a rate-limited response, or None."""
+        if response.status_code not in (403, 429):
+            return None
+        if 'Retry-After' in response.headers:
+            return float(response.headers['Retry-After'])
+        if response.headers.get('X-RateLimit-Remaining') == '0':
+            reset = int(response.headers.get('X-RateLimit-Reset', 0))
+            return max(0, reset - time.time())
+        if response.status_code == 429:
+            return SECONDARY_RATE_LIMIT_WAIT
+        return None
+
     def get_repository(self, repo_name: str) -> Dict[str, Any]:
         """Get a single repository's information."""
         url = f'{self.base_url}/repos/{self.org}/{repo_name}'
-        response = requests.get(url, headers=self.headers)
+        response = self._request('GET', url)
         response.raise_for_status()
         return response.json()
 
-    def get_repositories(self) -> List[Dict[str, Any]]:
-        """Get all repositories in the organization."""
-        repos = []
-        page = 1
-        while True:
-            url = f'{self.base_url}/orgs/{self.org}/repos'
-            params = {'page': page, 'per_page': 100}
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-
-            batch = response.json()
-            if not batch:
-                break
+    def _graphql(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a GraphQL query and return its data."""
+        response = self._request(
+            'POST', f'{self.base_url}/graphql',
+            json={'query': query, 'variables': variables})
+        response.raise_for_status()
+        payload = response.json()
+        if payload.get('errors'):
+            raise requests.exceptions.RequestException(
+                f"GraphQL query failed: {payload['errors'][0]['message']}")
+        return payload['data']
+
+    def iter_repositories(self, prefetch: int = 2) -> Iterator[Dict[str, Any]]:
+        """Yield all repositories in the organization, including their workflow files.
+
+        Pages are fetched lazily, so callers can start on the first page
+        before the rest of the organization has been listed. Up to
+        `prefetch` pages are fetched in the background while the current
+        one is being processed.
+        """
+        yield from PrefetchingPaginator(self._fetch_repositories_page, prefetch)
+
+    def _fetch_repositories_page(self, cursor: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Fetch one page of repositories and the cursor of the next page."""
+        data = self._graphql(REPOSITORIES_QUERY, {
+            'org': self.org,
+            'cursor': cursor,
+            'withContents': self.verify_contents,
+        })
+        connection = data['organization']['repositories']
+        repos = [self._repository_from_node(node)
+                 for node in connection['nodes']]
+
+        if not connection['pageInfo']['hasNextPage']:
+            return repos, None
+        return repos, connection['pageInfo']['endCursor']
 
-            repos.extend(batch)
-            page += 1
+    def get_repositories(self) -> List[Dict[str, Any]]:
+        """Get all repositories in the organization, including their workflow files."""
+        return list(self.iter_repositories())
+
+    @staticmethod
+    def _repository_from_node(node: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a GraphQL repository node to the REST repository shape."""
+        entries = node['workflows']['entries'] if node['workflows'] else []
+        workflow_files = []
+        for entry in entries:
+            workflow = {'name': entry['name']}
+            content = None
+            # The blob is only part of the response when contents are verified
+            if 'object' in entry:
+                content = (entry['object'] or {}).get('text') or ''
+                workflow['content'] = content
+            if is_workflow_file(entry['name'], content):
+                workflow_files.append(workflow)
+
+        return {
+            'name': node['name'],
+            'private': node['isPrivate'],
+            'archived': node['isArchived'],
+            'disabled': node['isDisabled'],
+            'fork': node['isFork'],
+            'created_at': node['createdAt'],
+            'updated_at': node['updatedAt'],
+            'pushed_at': node['pushedAt'],
+            'default_branch': (node['defaultBranchRef'] or {}).get('name'),
+            'html_url': node['url'],
+            'workflow_files': workflow_files,
+        }
 
-        return repos
+    def get_workflow_files(self, repo_name: str, default_branch: str,
+                           verify_contents: bool = False) -> List[Dict[str, Any]]:
+        """Get workflow files from .github/workflows directory.
 
-    def get_workflow_files(self, repo_name: str, default_branch: str) -> List[Dict[str, Any]]:
-        """Get workflow files from .github/workflows directory."""
+        With verify_contents, each file is downloaded and kept only if it
+        looks like a workflow definition.
+        """
         workflows = []
         url = f'{
             self.base_url}/repos/{self.org}/{repo_name}/contents/.github/workflows'
         params = {'ref': default_branch}
 
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self._request('GET', url, params=params)
             if response.status_code == 404:
                 return []
 
@@ -61,21 +420,22 @@ class GitHubActionsAudit:
 
             workflows = [
                 content for content in contents
-                if content['name'].endswith(('.yml', '.yaml'))
+                if is_workflow_file(content['name'])
             ]
+            if not verify_contents:
+                return workflows
 
             verified_workflows = []
             for workflow in workflows:
                 try:
-                    file_response = requests.get(
-                        workflow['url'], headers=self.headers)
+                    # Ask for the raw file to skip the base64 round-trip
+                    file_response = self._request(
+                        'GET', workflow['url'],
+                        headers={'Accept': 'application/vnd.github.raw'})
                     file_response.raise_for_status()
-                    file_content = file_response.json()
+                    content = file_response.text
 
-                    content = base64.b64decode(
-                        file_content['content']).decode('utf-8')
-
-                    if 'on:' in content or 'jobs:' in content:
+                    if is_workflow_file(workflow['name'], content):
                         workflow['content'] = content
                         verified_workflows.append(workflow)
                 except Exception as e:
@@ -89,17 +449,8 @@ class GitHubActionsAudit:
             print(f"Error checking workflows for {repo_name}: {e}")
             return []
 
-    def check_actions_enabled(self, repo_name: str) -> Dict[str, Any]:
+    def check_actions_enabled(self, repo_name: str, is_fork: bool) -> Dict[str, Any]:
         """Check GitHub Actions permissions and settings for the repository."""
-        # First get basic repo info to check if it's a fork
-        repo_url = f'{self.base_url}/repos/{self.org}/{repo_name}'
-        repo_response = requests.get(repo_url, headers=self.headers)
-        repo_response.raise_for_status()
-        repo_data = repo_response.json()
-
-        # Check if it's a fork
-        is_fork = repo_data.get('fork', False)
-
         result = {
             'is_fork': is_fork,
             'fork_status': 'N/A',
@@ -112,8 +463,7 @@ class GitHubActionsAudit:
         if is_fork:
             fork_settings_url = f'{
                 self.base_url}/repos/{self.org}/{repo_name}/actions/permissions'
-            settings_response = requests.get(
-                fork_settings_url, headers=self.headers)
+            settings_response = self._request('GET', fork_settings_url)
 
             if settings_response.status_code == 200:
                 settings_data = settings_response.json()
@@ -122,8 +472,7 @@ class GitHubActionsAudit:
                 # Check for fork-specific workflows state
                 fork_settings_url = f'{self.base_url}/repos/{self.org}/{
                     repo_name}/actions/permissions/workflows/fork-pull-requests'
-                fork_response = requests.get(
-                    fork_settings_url, headers=self.headers)
+                fork_response = self._request('GET', fork_settings_url)
 
                 if fork_response.status_code == 200:
                     fork_data = fork_response.json()
@@ -142,7 +491,7 @@ class GitHubActionsAudit:
             # Not a fork, use regular permissions endpoint
             actions_url = f'{
                 self.base_url}/repos/{self.org}/{repo_name}/actions/permissions'
-            actions_response = requests.get(actions_url, headers=self.headers)
+            actions_response = self._request('GET', actions_url)
 
             if actions_response.status_code == 200:
                 actions_data = actions_response.json()
@@ -156,8 +505,7 @@ class GitHubActionsAudit:
         if result['enabled']:
             workflow_url = f'{
                 self.base_url}/repos/{self.org}/{repo_name}/actions/permissions/workflow'
-            workflow_response = requests.get(
-                workflow_url, headers=self.headers)
+            workflow_response = self._request('GET', workflow_url)
             if workflow_response.status_code == 200:
                 workflow_data = workflow_response.json()
                 result.update({
@@ -178,21 +526,69 @@ class GitHubActionsAudit:
 
     def audit_all_repositories(self) -> pd.DataFrame:
         """Audit all repositories in the organization."""
-        repositories = self.get_repositories()
-        return self.process_repositories(repositories)
+        return self.process_repositories(self.iter_repositories())
 
-    def process_repositories(self, repositories: List[Dict[str, Any]]) -> pd.DataFrame:
+    def process_repositories(self, repositories: Iterable[Dict[str, Any]]) -> pd.DataFrame:
         """Process repository data and return results as a DataFrame."""
-        results = []
-
-        for repo in repositories:
-            print(f"\nChecking repository: {repo['name']}")
+        # Build the frame column by column instead of from a list of row dicts
+        columns = {name: [] for name in RESULT_COLUMNS}
+        for row in self.iter_audit(repositories):
+            for name in RESULT_COLUMNS:
+                columns[name].append(row[name])
+
+        columns['created_at'] = pd.to_datetime(columns['created_at'], utc=True)
+        columns['updated_at'] = pd.to_datetime(columns['updated_at'], utc=True)
+        return pd.DataFrame(columns, columns=RESULT_COLUMNS).astype(RESULT_DTYPES)
+
+    def iter_audit(self, repositories: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Audit repositories concurrently, yielding result rows in order as they finish.
+
+        Repositories are submitted as soon as the iterable produces them, so
+        auditing overlaps with listing when given iter_repositories(). At most
+        2 * max_workers audits are in flight; beyond that, listing waits for
+        the oldest audit to finish.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        pending = deque()
+        try:
+            for repo in repositories:
+                if len(pending) >= 2 * self.max_workers:
+                    yield pending.popleft().result()
+                pending.append(executor.submit(self._audit_one, repo))
+                while pending and pending[0].done():
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # If the caller stops early (Ctrl-C, a failed write), drop the
+            # queued audits instead of waiting for them
+            executor.shutdown(cancel_futures=True)
+
+    def _audit_one(self, repo: Dict[str, Any]) -> Dict[str, Any]:
+        """Audit a single repository and return its result row."""
+        # A repository whose metadata and pushes are unchanged since the
+        # previous audit keeps its previous row
+        state = [repo['updated_at'], repo.get('pushed_at')]
+        self.state[repo['name']] = state
+        previous = self.previous_rows.get(repo['name'])
+        if previous is not None and self.previous_state.get(repo['name']) == state:
+            with self._print_lock:
+                print(f"\nUnchanged since previous audit: {repo['name']}")
+            return previous
+
+        # Repositories listed through GraphQL already carry their workflow files
+        workflow_files = repo.get('workflow_files')
+        if workflow_files is None:
             workflow_files = self.get_workflow_files(
-                repo['name'], repo['default_branch'])
-            actions_status = self.check_actions_enabled(repo['name'])
+                repo['name'], repo['default_branch'], self.verify_contents)
+        actions_status = self.check_actions_enabled(repo['name'], repo['fork'])
 
-            workflow_names = [w['name'] for w in workflow_files]
+        workflow_names = [w['name'] for w in workflow_files]
 
+        # Print the whole block at once so concurrent audits don't interleave
+        with self._print_lock:
+            print(f"\nChecking repository: {repo['name']}")
             print(f"Is fork: {actions_status['is_fork']}")
             print(f"Fork workflow status: {actions_status['fork_status']}")
             print(f"Actions enabled: {actions_status['enabled']}")
@@ -201,27 +597,25 @@ class GitHubActionsAudit:
             print(f"Workflow files found: {', '.join(
                 workflow_names) if workflow_names else 'None'}")
 
-            results.append({
-                'repository': repo['name'],
-                'visibility': 'private' if repo['private'] else 'public',
-                'archived': repo['archived'],
-                'disabled': repo['disabled'],
-                'fork': actions_status['is_fork'],
-                'fork_workflow_status': actions_status['fork_status'],
-                'created_at': repo['created_at'],
-                'updated_at': repo['updated_at'],
-                'actions_enabled': actions_status['enabled'],
-                'actions_status': actions_status['status'],
-                'allowed_actions': actions_status['allowed_actions'],
-                'default_workflow_permissions': actions_status.get('default_workflow_permissions', 'N/A'),
-                'can_approve_pull_request_reviews': actions_status.get('can_approve_pull_request_reviews', 'N/A'),
-                'workflow_count': len(workflow_files),
-                'workflow_files': ', '.join(workflow_names) if workflow_names else None,
-                'default_branch': repo['default_branch'],
-                'url': repo['html_url']
-            })
-
-        return pd.DataFrame(results)
+        return {
+            'repository': repo['name'],
+            'visibility': 'private' if repo['private'] else 'public',
+            'archived': repo['archived'],
+            'disabled': repo['disabled'],
+            'fork': actions_status['is_fork'],
+            'fork_workflow_status': actions_status['fork_status'],
+            'created_at': repo['created_at'],
+            'updated_at': repo['updated_at'],
+            'actions_enabled': actions_status['enabled'],
+            'actions_status': actions_status['status'],
+            'allowed_actions': actions_status['allowed_actions'],
+            'default_workflow_permissions': actions_status.get('default_workflow_permissions', 'N/A'),
+            'can_approve_pull_request_reviews': actions_status.get('can_approve_pull_request_reviews', 'N/A'),
+            'workflow_count': len(workflow_files),
+            'workflow_files': ', '.join(workflow_names) if workflow_names else None,
+            'default_branch': repo['default_branch'],
+            'url': repo['html_url']
+        }
 
 
 def main():
@@ -233,6 +627,14 @@ def main():
         '--repo', help='Specific repository to audit (optional)')
     parser.add_argument('--token', help='GitHub token',
                         default=os.getenv('GITHUB_TOKEN'))
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                        help='Number of repositories to audit concurrently')
+    parser.add_argument('--verify-contents', action='store_true',
+                        help='Download workflow files and skip those that are not workflow definitions')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Do not use or update the on-disk HTTP cache')
+    parser.add_argument('--previous',
+                        help='CSV of a previous audit; unchanged repositories reuse its rows')
     args = parser.parse_args()
 
     if not args.token:
@@ -242,27 +644,49 @@ def main():
         raise ValueError(
             "Organization name is required. Set GITHUB_ORG or use --org")
 
-    auditor = GitHubActionsAudit(args.token, args.org)
+    auditor = GitHubActionsAudit(
+        args.token, args.org, args.workers, args.verify_contents,
+        cache=not args.no_cache)
 
     try:
+        if args.previous and auditor.load_previous(args.previous):
+            print(f"Reusing unchanged repositories from: {args.previous}")
         print(f"Starting audit for organization: {args.org}")
         if args.repo:
             print(f"Auditing single repository: {args.repo}")
-            results_df = auditor.audit_single_repository(args.repo)
+            repositories = [auditor.get_repository(args.repo)]
         else:
             print("Auditing all repositories...")
-            results_df = auditor.audit_all_repositories()
-
-        if not results_df.empty:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            repo_part = f"_{args.repo}" if args.repo else ""
-            filename = f'github_actions_audit_{
-                args.org}{repo_part}_{timestamp}.csv'
-            results_df.to_csv(filename, index=False)
-            print(f"\nResults saved to: {filename}")
+            repositories = auditor.iter_repositories()
+
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        repo_part = f"_{args.repo}" if args.repo else ""
+        filename = f'github_actions_audit_{
+            args.org}{repo_part}_{timestamp}.csv'
+
+        # Write each row as soon as it is audited rather than holding the
+        # whole report in memory
+        total_repos = 0
+        repos_with_workflows = 0
+        with open(filename, 'w', newline='') as fh:
+            writer = csv.DictWriter(fh, fieldnames=RESULT_COLUMNS)
+            writer.writeheader()
+            for row in auditor.iter_audit(repositories):
+                writer.writerow(row)
+                fh.flush()
+                total_repos += 1
+                if row['workflow_count'] > 0:
+                    repos_with_workflows += 1
+        auditor.save_state(filename)
+
+        print(f"\nResults saved to: {filename}")
+        print(f"Repositories audited: {total_repos}")
+        print(f"Repositories with workflows: {repos_with_workflows}")
 
     except Exception as e:
         print(f"Error during audit: {e}")
+    finally:
+        auditor.close()
 
 
 if __name__ == "__main__":
@@ -1,8 +1,100 @@
-from github import Github
+from github import Github, GithubException, GithubRetry, UnknownObjectException
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from dateutil.parser import parse as parse_date
-from pprint import pprint
-from typing import Optional  # Import Optional for type hinting
+import json
+import os
+import threading
+import time
+from urllib.parse import urlencode
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple  # Import Optional for type hinting
+
+_print_lock = threading.Lock()
+
+# Comments of a pull request with just the fields get_comments_ids filters
+# on. fullDatabaseId is the REST comment ID; databaseId overflows for new comments
+PULL_REQUEST_COMMENTS_QUERY = """
+query($owner: String!, $name: String!, $number: Int!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    pullRequest(number: $number) {
+      comments(first: 100, after: $cursor) {
+        pageInfo {
+          hasNextPage
+          endCursor
+        }
+        nodes {
+          fullDatabaseId
+          body
+          author {
+            __typename
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+# Open pull requests, least recently updated first, with just the fields the
+# stale check needs
+OPEN_PULL_REQUESTS_QUERY = """
+query($owner: String!, $name: String!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(first: 100, states: OPEN, after: $cursor, orderBy: {field: UPDATED_AT, direction: ASC}) {
+      pageInfo {
+        hasNextPage
+        endCursor
+      }
+      nodes {
+        id
+        number
+        updatedAt
+        labels(first: 100) {
+          nodes {
+            name
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+# Node ID of a repository label, which GraphQL mutations take instead of its name
+LABEL_ID_QUERY = """
+query($owner: String!, $name: String!, $label: String!) {
+  repository(owner: $owner, name: $name) {
+    label(name: $label) {
+      id
+    }
+  }
+}
+"""
+
+# Stale PRs updated together; each GraphQL request carries at most one
+# aliased mutation per PR
+PULL_REQUEST_MUTATION_BATCH_SIZE = 20
+
+# Attempts, and the first backoff in seconds, for a GraphQL query failing with
+# a server error. GraphQL goes over POST, which the client's retry leaves alone
+# so that mutations are never resent; queries only read and are safe to repeat
+GRAPHQL_QUERY_ATTEMPTS = 4
+GRAPHQL_QUERY_BACKOFF = 1.0
+
+
+class WriteSafeRetry(GithubRetry):
+    """
+    GithubRetry that resends writes only when GitHub rate-limited them.
+
+    A rate-limited request was not processed, so any method can be retried.
+    A 5xx or a read timeout can follow a POST or PATCH that took effect, so
+    those are only retried for the methods in allowed_methods.
+    """
+    RATE_LIMIT_STATUSES = frozenset([403, 429])
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if status_code in self.RATE_LIMIT_STATUSES and status_code in self.status_forcelist:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
 
 
 def create_issue_from_string(
@@ -17,7 +109,7 @@ def create_issue_from_string(
     if not all([repo, issue_title, issue_body, github]):
         raise ValueError("All parameters must be provided and valid.")
 
-    repository = github.get_repo(repo)
+    repository = github.get_repo(repo, lazy=True)
 
     # Prepare issue data
     issue_data = {
@@ -51,21 +143,22 @@ def post_pr_comment(
     if not all([repo, pr_number, comment_body, github]):
         raise ValueError("All parameters must be provided and valid.")
 
-    repository = github.get_repo(repo)
-    pull_request = repository.get_pull(pr_number)
+    repository = github.get_repo(repo, lazy=True)
 
     if comment_id:
         try:
-            # Fetch the existing comment and update it
-            comments = repository.get_issues_comments()
-            for comment in comments:
-                if comment.id == comment_id:
-                    comment.edit(comment_body)
-                    return f"Comment #{comment_id} updated successfully on PR #{pr_number} in {repo}."
+            # Update the comment through its own endpoint
+            github.requester.requestJsonAndCheck(
+                "PATCH",
+                f"{repository.url}/issues/comments/{comment_id}",
+                input={"body": comment_body},
+            )
+            return f"Comment #{comment_id} updated successfully on PR #{pr_number} in {repo}."
         except Exception as e:
             raise ValueError(f"Failed to update comment #{comment_id}: {e}")
     else:
         # Create a new comment
+        pull_request = repository.get_pull(pr_number)
         pull_request.create_issue_comment(comment_body)
         return f"Comment posted successfully to PR #{pr_number} in {repo}."
 
@@ -80,49 +173,276 @@ def delete_pr_comment(
     if not all([repo, pr_number, comment_ids, github]):
         raise ValueError("All parameters must be provided and valid.")
 
-    repository = github.get_repo(repo)
-    pull_request = repository.get_pull(pr_number)
+    repository = github.get_repo(repo, lazy=True)
 
     try:
         result = ""
-        # Fetch the existing comment and update it
-        comments = repository.get_issues_comments()
-        for comment in comments:
-            for comment_id in comment_ids.split(","):
-                if comment.id == int(comment_id):
-                    comment.delete()
-                    result += f"Comment #{comment_id} deleted successfully on PR #{
-                        pr_number} in {repo}.\n"
+        # Address each comment directly instead of scanning every comment in the repo
+        for comment_id in comment_ids.split(","):
+            try:
+                github.requester.requestJsonAndCheck(
+                    "DELETE", f"{repository.url}/issues/comments/{int(comment_id)}")
+            except UnknownObjectException:
+                continue
+            result += f"Comment #{comment_id} deleted successfully on PR #{
+                pr_number} in {repo}.\n"
         return result
     except Exception as e:
         raise ValueError(f"Failed to delete comment #{comment_ids}: {e}")
 
 
-def is_stale(updated_at: str, days_before_stale: int) -> bool:
-    """Check if an item (issue or PR) is stale based on its last update date."""
-    last_updated = updated_at.replace(tzinfo=timezone.utc)
-    days_since_update = (datetime.now(timezone.utc) - last_updated).days
-    return days_since_update >= days_before_stale
+def days_since_update(updated_at: datetime, now: Optional[datetime] = None) -> int:
+    """Return the number of whole days since an item (issue or PR) was last updated."""
+    if updated_at.tzinfo is None:
+        # Naive timestamps from GitHub are UTC
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return ((now or datetime.now(timezone.utc)) - updated_at.astimezone(timezone.utc)).days
 
 
-def get_comments_ids(github: Github, repo: str, pr_number: int, message_substring: str, user_type: str) -> list:
+def get_comments_ids(github: Github, repo: str, pr_number: int, message_substring: str, user_type: str) -> Iterator[str]:
     """
-    Fetch all comments in a pull request and extract comment IDs based on a specific condition.
+    Fetch all comments in a pull request and yield the IDs, as strings, of those matching a specific condition.
     """
-    repository = github.get_repo(repo)
-    pull_request = repository.get_pull(pr_number)
-    comments = pull_request.get_issue_comments()
+    return (
+        str(comment["fullDatabaseId"])
+        for comment in _iter_pull_request_comments(github, repo, pr_number)
+        if (not user_type or (comment["author"] or {}).get("__typename") == user_type)
+        and message_substring in comment["body"]
+    )
+
+
+def _graphql_query(github: Github, query: str, variables: dict) -> dict:
+    """
+    Run a read-only GraphQL query, retrying server errors with exponential backoff.
+    """
+    for attempt in range(GRAPHQL_QUERY_ATTEMPTS):
+        try:
+            return github.requester.graphql_query(query, variables)[1]
+        except GithubException as e:
+            if e.status < 500 or attempt == GRAPHQL_QUERY_ATTEMPTS - 1:
+                raise
+            time.sleep(GRAPHQL_QUERY_BACKOFF * 2 ** attempt)
+
 
-    matching_comment_ids = []
-    for comment in comments:
-        if user_type:
-            if comment.user.type == user_type and message_substring in comment.body:
-                matching_comment_ids.append(comment.id)
+def _iter_pull_request_comments(github: Github, repo: str, pr_number: int) -> Iterator[dict]:
+    """
+    Yield the comments of a pull request with only their ID, body and author type.
+    """
+    owner, name = repo.split("/")
+    variables = {"owner": owner, "name": name, "number": pr_number, "cursor": None}
+    while True:
+        data = _graphql_query(github, PULL_REQUEST_COMMENTS_QUERY, variables)
+        connection = data["data"]["repository"]["pullRequest"]["comments"]
+        yield from connection["nodes"]
+        if not connection["pageInfo"]["hasNextPage"]:
+            return
+        variables["cursor"] = connection["pageInfo"]["endCursor"]
+
+
+def _iter_pages(github: Github, url: str, parameters: dict, etag_cache: Optional[dict] = None) -> Iterator[dict]:
+    """
+    Yield the raw JSON items of a paginated REST listing, one page request at a time.
+
+    With an etag_cache, pages are requested conditionally and a 304 (which
+    does not count against the rate limit) is answered from the cache.
+    """
+    while url:
+        key = f"{url}?{urlencode(parameters)}" if parameters else url
+        cached = etag_cache.get(key) if etag_cache is not None else None
+        request_headers = {"If-None-Match": cached["etag"]} if cached else None
+
+        headers, items = github.requester.requestJsonAndCheck(
+            "GET", url, parameters=parameters, headers=request_headers)
+        if cached and items is None:
+            items, next_url = cached["items"], cached["next"]
         else:
-            if message_substring in comment.body:
-                matching_comment_ids.append(comment.id)
+            next_url = _link_url(headers, "next")
+            if etag_cache is not None and headers.get("etag"):
+                etag_cache[key] = {"etag": headers["etag"], "items": items, "next": next_url}
+
+        yield from items
+        url = next_url
+        parameters = None
+
+
+def _load_etag_cache(path: Optional[str]) -> Optional[dict]:
+    """
+    Load the listing ETag cache kept between runs, if one is configured.
+    """
+    if not path:
+        return None
+    if not os.path.exists(path):
+        return {}
+    with open(path) as cache_file:
+        return json.load(cache_file)
+
+
+def _save_etag_cache(path: Optional[str], etag_cache: Optional[dict]) -> None:
+    """
+    Write the listing ETag cache back to disk, if one is configured.
+    """
+    if path:
+        with open(path, "w") as cache_file:
+            json.dump(etag_cache, cache_file)
+
+
+def _iter_open_pull_requests(github: Github, repo: str) -> Iterator[dict]:
+    """
+    Yield the open pull requests of a repository, least recently updated first.
+    """
+    owner, name = repo.split("/")
+    variables = {"owner": owner, "name": name, "cursor": None}
+    while True:
+        data = _graphql_query(github, OPEN_PULL_REQUESTS_QUERY, variables)
+        connection = data["data"]["repository"]["pullRequests"]
+        yield from connection["nodes"]
+        if not connection["pageInfo"]["hasNextPage"]:
+            return
+        variables["cursor"] = connection["pageInfo"]["endCursor"]
+
+
+def _link_url(headers: dict, rel: str) -> Optional[str]:
+    """
+    Return the URL with the given relation from a GitHub Link header, if any.
+    """
+    for link in headers.get("link", "").split(","):
+        url, _, link_rel = link.partition(";")
+        if link_rel.strip() == f'rel="{rel}"':
+            return url.strip(" <>")
+    return None
+
+
+def _map_with_clients(github: Github, fn: Callable, items: Iterable, max_workers: int) -> list:
+    """
+    Call fn(client, item) for every item on a thread pool, returning results in order.
+
+    PyGithub clients are not thread-safe, so every worker gets its own copy
+    of the caller's client, closed once the pool is done. With a single
+    worker, fn runs inline on the caller's client instead.
+    """
+    if max_workers == 1:
+        return [fn(github, item) for item in items]
+
+    local = threading.local()
+    clients = []
+    clients_lock = threading.Lock()
+
+    def call(item):
+        if not hasattr(local, "github"):
+            local.github = Github(**github.requester.kwargs)
+            with clients_lock:
+                clients.append(local.github)
+        return fn(local.github, item)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(call, items))
+    finally:
+        for client in clients:
+            client.close()
+
+
+def _log(message: str) -> None:
+    """Print a line without interleaving it with output from other writer threads."""
+    with _print_lock:
+        print(message)
+
+
+def _apply_stale_action(
+    github: Github,
+    message: str,
+    error_message: str,
+    requests: List[Tuple[str, str, Any]]
+) -> None:
+    """
+    Issue the mutating calls for one stale item, reporting rather than raising errors.
+    """
+    _log(message)
+    try:
+        for verb, url, body in requests:
+            github.requester.requestJsonAndCheck(verb, url, input=body)
+    except Exception as e:
+        _log(f"{error_message}: {e}")
+
+
+def _apply_stale_actions(github: Github, actions: list, max_workers: int) -> None:
+    """
+    Apply the actions collected by a stale scan with max_workers writers.
+    """
+    _map_with_clients(github, lambda client, action: _apply_stale_action(client, *action), actions, max_workers)
 
-    return matching_comment_ids
+
+def _get_label_id(github: Github, repo: str, label: str) -> str:
+    """
+    Return the node ID of a repository label, creating the label if it does not exist.
+    """
+    owner, name = repo.split("/")
+    data = _graphql_query(
+        github, LABEL_ID_QUERY, {"owner": owner, "name": name, "label": label})
+    existing = data["data"]["repository"]["label"]
+    if existing:
+        return existing["id"]
+    # Adding a missing label by name over REST creates it; keep that behaviour
+    repository = github.get_repo(repo, lazy=True)
+    _, created = github.requester.requestJsonAndCheck(
+        "POST", f"{repository.url}/labels", input={"name": label})
+    return created["node_id"]
+
+
+def _apply_pull_request_mutations(github: Github, actions: List[Tuple[str, str, List[Tuple[str, dict]]]]) -> None:
+    """
+    Apply the mutations of several stale PR actions with aliased GraphQL requests.
+
+    Aliased mutations run independently, so an action's mutations go out in
+    rounds: the n-th request carries the n-th mutation of every action whose
+    earlier mutations succeeded. A PR whose label could not be added is not
+    commented on.
+    """
+    for message, _, _ in actions:
+        _log(message)
+
+    failed = set()
+    for position in range(max(len(mutations) for _, _, mutations in actions)):
+        mutations = {
+            index: action_mutations[position]
+            for index, (_, _, action_mutations) in enumerate(actions)
+            if index not in failed and position < len(action_mutations)
+        }
+        if not mutations:
+            return
+        for index, messages in sorted(_send_mutations(github, mutations).items()):
+            failed.add(index)
+            _log(f"{actions[index][1]}: {'; '.join(messages)}")
+
+
+def _send_mutations(github: Github, mutations: Dict[int, Tuple[str, dict]]) -> Dict[int, List[str]]:
+    """
+    Send mutations as one aliased GraphQL request, returning error messages by key.
+
+    Each mutation is a (name, input) pair, and its input is passed as a
+    variable rather than written into the document.
+    """
+    declarations, fields, variables = [], [], {}
+    for index, (name, mutation_input) in mutations.items():
+        alias = f"pr{index}"
+        declarations.append(f"${alias}: {name[0].upper()}{name[1:]}Input!")
+        fields.append(f"{alias}: {name}(input: ${alias}) {{ clientMutationId }}")
+        variables[alias] = mutation_input
+    document = f"mutation({', '.join(declarations)}) {{\n  " + "\n  ".join(fields) + "\n}"
+
+    try:
+        _, data = github.requester.requestJsonAndCheck(
+            "POST", github.requester.graphql_url, input={"query": document, "variables": variables})
+    except Exception as e:
+        return {index: [str(e)] for index in mutations}
+
+    errors = {}
+    for error in data.get("errors", []):
+        path = error.get("path")
+        # Errors without a path (e.g. a rejected document) concern every mutation
+        for index in [int(path[0][2:])] if path else mutations:
+            errors.setdefault(index, []).append(error.get("message"))
+    return errors
 
 
 def process_issues(
@@ -130,36 +450,53 @@ def process_issues(
     repo: str,
     stale_issue_label: str,
     days_before_stale: int,
-    days_before_close: int
+    days_before_close: int,
+    max_workers: int = 1,
+    etag_cache: Optional[str] = None
 ):
     """Process stale issues."""
-    repository = github.get_repo(repo)
-    issues = repository.get_issues(state="open", labels=[])
+    repository = github.get_repo(repo, lazy=True)
+    page_cache = _load_etag_cache(etag_cache)
+    # Oldest first, so the scan can stop at the first issue that is not stale
+    issues = _iter_pages(github, f"{repository.url}/issues", {
+        "state": "open", "sort": "updated", "direction": "asc", "per_page": 100}, page_cache)
+
+    now = datetime.now(timezone.utc)
 
-    print(f"Processing {issues.totalCount} issues...")
+    print(f"Processing open issues in {repo}...")
 
+    # Scan everything before mutating: closing issues mid-scan shifts the
+    # pages of the open-issue listing and would skip items.
+    actions = []
     for issue in issues:
         try:
             # Skip if it's a PR (issues API includes PRs)
-            if issue.pull_request:
+            if "pull_request" in issue:
                 continue
 
-            # Check if the issue is stale
-            if is_stale(issue.updated_at, days_before_stale):
-                if stale_issue_label not in [label.name for label in issue.labels]:
-                    print(
-                        f"Issue #{issue.number} is stale. Adding stale label.")
-                    issue.add_to_labels(stale_issue_label)
-                elif is_stale(issue.updated_at, days_before_stale + days_before_close):
-                    print(
-                        f"Issue #{issue.number} is stale and will be closed.")
-                    issue.edit(state="closed")
-            else:
-                print(f"Issue #{issue.number} is not stale.")
+            idle_days = days_since_update(datetime.fromisoformat(issue["updated_at"]), now)
+            if idle_days < days_before_stale:
+                print(f"Issue #{issue['number']} is not stale. Remaining issues are newer.")
+                break
+
+            labels = {label["name"] for label in issue["labels"]}
+            error_message = f"Error processing issue #{issue['number']}"
+
+            if stale_issue_label not in labels:
+                actions.append((
+                    f"Issue #{issue['number']} is stale. Adding stale label.", error_message,
+                    [("POST", f"{issue['url']}/labels", {"labels": [stale_issue_label]})]))
+            elif idle_days >= days_before_stale + days_before_close:
+                actions.append((
+                    f"Issue #{issue['number']} is stale and will be closed.", error_message,
+                    [("PATCH", issue["url"], {"state": "closed"})]))
         except Exception as e:
-            print(f"Error processing issue #{issue.number}: {e}")
+            print(f"Error processing issue #{issue['number']}: {e}")
             continue
 
+    _save_etag_cache(etag_cache, page_cache)
+    _apply_stale_actions(github, actions, max_workers)
+
 
 def process_pull_requests(
     github: Github,
@@ -168,42 +505,73 @@ def process_pull_requests(
     stale_issue_label: str,
     exempt_labels: list,
     days_before_stale: int,
-    days_before_close: int
+    days_before_close: int,
+    max_workers: int = 1
 ):
     """Process stale pull requests."""
-    repository = github.get_repo(repo)
-    prs = repository.get_pulls(state="open")
+    prs = _iter_open_pull_requests(github, repo)
+
+    exempt_set = frozenset(exempt_labels)
+    now = datetime.now(timezone.utc)
 
-    print(f"Processing {prs.totalCount} pull requests...")
+    print(f"Processing open pull requests in {repo}...")
 
+    # Stale PRs found by the scan, with whether each is due to be closed
+    stale_prs = []
     for pr in prs:
         try:
+            idle_days = days_since_update(datetime.fromisoformat(pr["updatedAt"]), now)
+            if idle_days < days_before_stale:
+                print(f"PR #{pr['number']} is not stale. Remaining PRs are newer.")
+                break
+
+            labels = {label["name"] for label in pr["labels"]["nodes"]}
+
             # Skip if PR has an exempt label
-            if any(label.name in exempt_labels for label in pr.labels):
-                print(f"Skipping PR #{pr.number} due to exempt label.")
+            if labels & exempt_set:
+                print(f"Skipping PR #{pr['number']} due to exempt label.")
                 continue
 
-            # Check if the PR is stale
-            if is_stale(pr.updated_at, days_before_stale):
-                if stale_issue_label not in [label.name for label in pr.labels]:
-                    print(
-                        f"PR #{pr.number} is stale. Adding stale label and posting comment.")
-                    pr.as_issue().add_to_labels(stale_issue_label)
-                    pr.create_issue_comment(stale_pr_message)
-                elif is_stale(pr.updated_at, days_before_stale + days_before_close):
-                    print(f"PR #{pr.number} is stale and will be closed.")
-                    pr.edit(state="closed")
-            else:
-                print(f"PR #{pr.number} is not stale.")
+            if stale_issue_label not in labels:
+                stale_prs.append((pr, False))
+            elif idle_days >= days_before_stale + days_before_close:
+                stale_prs.append((pr, True))
         except Exception as e:
-            print(f"Error processing PR #{pr.number}: {e}")
+            print(f"Error processing PR #{pr['number']}: {e}")
             continue
 
+    if not stale_prs:
+        return
+
+    # GraphQL mutations address labels by node ID, so only look it up when needed
+    label_id = None
+    if not all(close for _, close in stale_prs):
+        label_id = _get_label_id(github, repo, stale_issue_label)
+
+    actions = []
+    for pr, close in stale_prs:
+        error_message = f"Error processing PR #{pr['number']}"
+        if close:
+            actions.append((
+                f"PR #{pr['number']} is stale and will be closed.", error_message,
+                [("closePullRequest", {"pullRequestId": pr["id"]})]))
+        else:
+            # The comment is only posted once the label is on
+            actions.append((
+                f"PR #{pr['number']} is stale. Adding stale label and posting comment.", error_message,
+                [("addLabelsToLabelable", {"labelableId": pr["id"], "labelIds": [label_id]}),
+                 ("addComment", {"subjectId": pr["id"], "body": stale_pr_message})]))
+
+    # Several PRs per request, with max_workers batches in flight
+    batches = [actions[start:start + PULL_REQUEST_MUTATION_BATCH_SIZE]
+               for start in range(0, len(actions), PULL_REQUEST_MUTATION_BATCH_SIZE)]
+    _map_with_clients(github, _apply_pull_request_mutations, batches, max_workers)
+
 
 def get_pr_base_sha(github: Github, repo: str, pr_number: int) -> str:
     """
     Fetch the base commit SHA of a pull request.
     """
-    repository = github.get_repo(repo)
+    repository = github.get_repo(repo, lazy=True)
     pull_request = repository.get_pull(pr_number)
     return pull_request.base.sha
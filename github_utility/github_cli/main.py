@@ -1,56 +1,157 @@
-import typer
+import argparse
 import re  # For regular expressions
-from github import Github, GithubIntegration, GithubException
-from typing import Optional  # Import Optional for type hinting
+import sys
+from functools import lru_cache, wraps
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional  # Import Optional for type hinting
 from pathlib import Path  # For file operations
-from pprint import pprint  # For pretty printing
-from commands import (
-    post_pr_comment,
-    delete_pr_comment,
-    process_issues,
-    process_pull_requests,
-    get_comments_ids,
-    get_pr_base_sha,
-    create_issue_from_string,
-)
-app = typer.Typer(help="CLI tool for GitHub operations.",
-                  pretty_exceptions_show_locals=False)
+
+# PyGithub and the commands built on it are imported by the commands that
+# need them, so --help and argument errors don't pay for loading them
+if TYPE_CHECKING:
+    from github import Github
+
+parser = argparse.ArgumentParser(description="CLI tool for GitHub operations.")
+subparsers = parser.add_subparsers(dest="command", required=True)
+COMMANDS: Dict[str, Callable[..., Any]] = {}
+
+# Patterns used to restore the line breaks of a PEM key passed on one line
+_PEM_BEGIN_RE = re.compile(r"(-----BEGIN [A-Z ]+-----)\s+")
+_PEM_END_RE = re.compile(r"\s+(-----END [A-Z ]+-----)")
+_SPACE_TO_NEWLINE = str.maketrans(" ", "\n")
+
+# Largest page size the REST API allows; PyGithub defaults to 30
+GITHUB_PER_PAGE = 100
+# Requests that must remain, in the rate limit a bulk command spends (core for
+# REST, graphql for GraphQL), before it starts
+BULK_MIN_RATE_LIMIT = 100
+# Retries with exponential backoff on rate limits and server errors; GitHub's
+# own retry class also waits out 403 rate-limit responses until they reset.
+# Server errors and read timeouts are only retried for idempotent methods, as
+# a POST or PATCH may already have taken effect; rate-limited writes were not
+# processed and are retried whatever the method
+GITHUB_RETRY_TOTAL = 10
+GITHUB_RETRY_BACKOFF = 1.0
+GITHUB_RETRY_STATUSES = [429, 500, 502, 503, 504]
+GITHUB_RETRY_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
 
 
 def fix_pem_string(content: str) -> str:
     """
     Fix the formatting of a PEM string by replacing spaces in the body with newlines.
     """
-    content = re.sub(r"(-----BEGIN [A-Z ]+-----)\s+",
-                     r"\1\n", content)  # Fix BEGIN line
-    content = re.sub(r"\s+(-----END [A-Z ]+-----)",
-                     r"\n\1", content)    # Fix END line
+    content = _PEM_BEGIN_RE.sub(r"\1\n", content)  # Fix BEGIN line
+    content = _PEM_END_RE.sub(r"\n\1", content)    # Fix END line
 
-    # Replace spaces in the body with newlines
-    fixed_content = re.sub(r"(?<=-----\n)(.+?)(?=\n-----)",
-                           lambda match: match.group(0).replace(" ", "\n"),
-                           content, flags=re.S)
-    return fixed_content
+    # Replace spaces in the body (between a BEGIN and an END line) with newlines
+    fixed_parts = []
+    while True:
+        head, begin, rest = content.partition("-----\n")
+        body, end, content = rest.partition("\n-----")
+        if not end:
+            fixed_parts.append(head + begin + rest)
+            return "".join(fixed_parts)
+        fixed_parts.append(head + begin + body.translate(_SPACE_TO_NEWLINE) + end)
 
 
 def get_github_client(
-    github_token: Optional[str] = None
-) -> Github:
+    github_token: Optional[str] = None,
+    min_rate_limit: int = 0,
+    rate_limit_resource: str = "core"
+) -> "Github":
     """
     Create a GitHub client using either a GitHub token
 
+    Clients are cached per token so repeated calls share one connection pool.
+
     :param github_token: Personal GitHub token.
+    :param min_rate_limit: Fail fast unless at least this many requests remain.
+    :param rate_limit_resource: Rate limit checked by min_rate_limit, "core" or "graphql".
     :return: Authenticated GitHub client.
     """
     if github_token:
-        return Github(github_token)
+        github = _create_github_client(github_token)
     else:
-        typer.echo(
-            f"Provide a GitHub token to authenticate with GitHub.", err=True)
-        raise typer.Exit(code=1)
+        print("Provide a GitHub token to authenticate with GitHub.", file=sys.stderr)
+        sys.exit(1)
+
+    if min_rate_limit:
+        # /rate_limit itself does not count against the limit
+        rate = getattr(github.get_rate_limit(), rate_limit_resource)
+        if rate.remaining < min_rate_limit:
+            raise RuntimeError(
+                f"Only {rate.remaining} GitHub {rate_limit_resource} API requests remain until "
+                f"{rate.reset:%Y-%m-%d %H:%M:%S} UTC; at least {min_rate_limit} are needed.")
+    return github
+
+
+@lru_cache(maxsize=4)
+def _create_github_client(github_token: str) -> "Github":
+    """Build the GitHub client shared by all calls with the same token."""
+    from github import Github
+    from commands import WriteSafeRetry
+
+    retry = WriteSafeRetry(
+        total=GITHUB_RETRY_TOTAL,
+        backoff_factor=GITHUB_RETRY_BACKOFF,
+        status_forcelist=GITHUB_RETRY_STATUSES,
+        allowed_methods=GITHUB_RETRY_METHODS,
+    )
+    return Github(github_token, per_page=GITHUB_PER_PAGE, retry=retry)
 
 
-@app.command("get-github-access-token")
+def option(*flags: str, **kwargs: Any) -> tuple:
+    """Describe a command-line option, with the arguments of add_argument."""
+    return flags, kwargs
+
+
+def command(name: str, *options: tuple) -> Callable:
+    """
+    Register a function as a subcommand taking the given options.
+    """
+    def register(fn: Callable) -> Callable:
+        doc = (fn.__doc__ or "").strip()
+        command_parser = subparsers.add_parser(
+            name, help=doc.splitlines()[0] if doc else None, description=doc or None)
+        for flags, kwargs in options:
+            command_parser.add_argument(*flags, **kwargs)
+        COMMANDS[name] = fn
+        return fn
+    return register
+
+
+def cli_errors(fn):
+    """
+    Report any error raised by a command as "Error: ..." and exit with code 1.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+    return wrapper
+
+
+GITHUB_TOKEN_OPTION = option(
+    "--github-token", help="GitHub token with permissions to create issues.")
+REPO_OPTION = option(
+    "--repo", required=True, help="GitHub repository in the format 'owner/repo'.")
+PR_NUMBER_OPTION = option(
+    "--pr-number", type=int, required=True, help="Pull request number.")
+MAX_WORKERS_OPTION = option(
+    "--max-workers", type=int, default=1,
+    help="Concurrent writers for label, comment and close calls. GitHub asks for writes to be serial.")
+
+
+@command(
+    "get-github-access-token",
+    option("--app-id", type=int),
+    option("--private-key-path", type=Path),
+    option("--private-key-str"),
+    option("--repo"),
+)
+@cli_errors
 def get_github_acces_token(
     app_id: Optional[int] = None,
     private_key_path: Optional[Path] = None,
@@ -67,15 +168,17 @@ def get_github_acces_token(
     :param repo: Repository in the format 'owner/repo', required for GitHub App.
     :return: access token.
     """
+    from github import GithubIntegration, GithubException
+
     if app_id and (private_key_path or private_key_str) and repo:
         # Read private key from file or use the provided string
         private_key = None
         if private_key_path:
-            if not private_key_path.exists() or not private_key_path.is_file():
+            try:
+                private_key = private_key_path.read_text()
+            except (FileNotFoundError, IsADirectoryError):
                 raise FileNotFoundError(f"Private key file '{
                                         private_key_path}' does not exist.")
-            with private_key_path.open("r") as key_file:
-                private_key = key_file.read()
         elif private_key_str:
             private_key = private_key_str
 
@@ -96,258 +199,294 @@ def get_github_acces_token(
                     repo}' or the credentials are invalid.")
             raise e
         access_token = integration.get_access_token(installation.id).token
-        typer.echo(f"{access_token}")
+        print(f"{access_token}")
     else:
-        typer.echo(
-            f"Provide GitHub App credentials (app_id, private_key, and repo).", err=True)
-        raise typer.Exit(code=1)
-
-
-@app.command("create-issue-from-file")
+        print("Provide GitHub App credentials (app_id, private_key, and repo).", file=sys.stderr)
+        sys.exit(1)
+
+
+@command(
+    "create-issue-from-file",
+    GITHUB_TOKEN_OPTION,
+    REPO_OPTION,
+    option("--file-path", type=Path, required=True,
+           help="Path to the file containing issue content."),
+    option("--issue-title", required=True, help="Title of the issue to create."),
+    option("--issue-labels", help="Comma-separated list of labels for the issue."),
+    option("--assignees", help="Comma-separated list of GitHub usernames to assign."),
+)
+@cli_errors
 def cli_create_issue_from_file(
-    github_token: Optional[str] = typer.Option(
-        None, help="GitHub token with permissions to create issues."),
-    repo: str = typer.Option(...,
-                             help="GitHub repository in the format 'owner/repo'."),
-    file_path: Path = typer.Option(...,
-                                   help="Path to the file containing issue content."),
-    issue_title: str = typer.Option(..., help="Title of the issue to create."),
-    issue_labels: Optional[str] = typer.Option(
-        None, help="Comma-separated list of labels for the issue."),
-    assignees: Optional[str] = typer.Option(
-        None, help="Comma-separated list of GitHub usernames to assign."),
+    github_token: Optional[str],
+    repo: str,
+    file_path: Path,
+    issue_title: str,
+    issue_labels: Optional[str] = None,
+    assignees: Optional[str] = None,
 ):
     """
     Create an issue from a file, with optional labels and assignees.
     """
-    try:
-        # Read file content
-        if not file_path.exists() or not file_path.is_file():
-            raise FileNotFoundError(
-                f"The file '{file_path}' does not exist or is not a valid file.")
+    from commands import create_issue_from_string
 
-        with file_path.open("r") as file:
-            issue_body = file.read().strip()
-
-        if not issue_body:
-            raise ValueError(
-                "The file is empty. Provide a file with valid issue content.")
+    # Read file content; opening it already fails for missing files and directories
+    try:
+        issue_body = file_path.read_text(encoding="utf-8").strip()
+    except (FileNotFoundError, IsADirectoryError):
+        raise FileNotFoundError(
+            f"The file '{file_path}' does not exist or is not a valid file.")
 
-        # Connect to GitHub
-        github = get_github_client(github_token)
+    if not issue_body:
+        raise ValueError(
+            "The file is empty. Provide a file with valid issue content.")
 
-        issue = create_issue_from_string(
-            github, repo, issue_title, issue_body, issue_labels, assignees)
+    # Connect to GitHub
+    github = get_github_client(github_token)
 
-        typer.echo(f"Issue #{issue.number} created successfully: {
-                   issue.html_url}")
+    issue = create_issue_from_string(
+        github, repo, issue_title, issue_body, issue_labels, assignees)
 
-    except Exception as e:
-        typer.echo(f"Error: {e}", err=True)
-        raise typer.Exit(code=1)
+    print(f"Issue #{issue.number} created successfully: {
+          issue.html_url}")
 
 
-@app.command("create-issue-from-string")
+@command(
+    "create-issue-from-string",
+    GITHUB_TOKEN_OPTION,
+    REPO_OPTION,
+    option("--issue-body", required=True, help="Content of the issue."),
+    option("--issue-title", required=True, help="Title of the issue to create."),
+    option("--issue-labels", help="Comma-separated list of labels for the issue."),
+    option("--assignees", help="Comma-separated list of GitHub usernames to assign."),
+)
+@cli_errors
 def cli_create_issue_from_string(
-    github_token: Optional[str] = typer.Option(
-        None, help="GitHub token with permissions to create issues."),
-
-    repo: str = typer.Option(...,
-                             help="GitHub repository in the format 'owner/repo'."),
-    issue_body: str = typer.Option(..., help="Content of the issue."),
-    issue_title: str = typer.Option(..., help="Title of the issue to create."),
-    issue_labels: Optional[str] = typer.Option(
-        None, help="Comma-separated list of labels for the issue."),
-    assignees: Optional[str] = typer.Option(
-        None, help="Comma-separated list of GitHub usernames to assign."),
+    github_token: Optional[str],
+    repo: str,
+    issue_body: str,
+    issue_title: str,
+    issue_labels: Optional[str] = None,
+    assignees: Optional[str] = None,
 ):
     """
     Create an issue from a string, with optional labels and assignees.
     """
-    try:
-        # Connect to GitHub
-        github = get_github_client(github_token)
+    from commands import create_issue_from_string
 
-        issue = create_issue_from_string(
-            github, repo, issue_title, issue_body, issue_labels, assignees)
+    # Connect to GitHub
+    github = get_github_client(github_token)
 
-        typer.echo(f"Issue #{issue.number} created successfully: {
-                   issue.html_url}")
+    issue = create_issue_from_string(
+        github, repo, issue_title, issue_body, issue_labels, assignees)
 
-    except Exception as e:
-        typer.echo(f"Error: {e}", err=True)
-        raise typer.Exit(code=1)
+    print(f"Issue #{issue.number} created successfully: {
+          issue.html_url}")
 
 
-@app.command("post-pr-comment")
-def cli_post_pr_comment(
-    github_token: Optional[str] = typer.Option(
-        None, help="GitHub token with permissions to create issues."),
-
-    repo: str = typer.Option(...,
-                             help="GitHub repository in the format 'owner/repo'."),
-    pr_number: int = typer.Option(..., help="Pull request number."),
-    comment_body: str = typer.Option(..., help="The comment text."),
-    comment_id: Optional[int] = typer.Option(
-        None,
+@command(
+    "post-pr-comment",
+    GITHUB_TOKEN_OPTION,
+    REPO_OPTION,
+    PR_NUMBER_OPTION,
+    option("--comment-body", required=True, help="The comment text."),
+    option(
         "--comment-id",
-        help="ID of the comment to update. If not provided, a new comment will be created."
+        help="ID of the comment to update. Can be multiple IDs separated by commas. If not provided, a new comment will be created."
     ),
+)
+@cli_errors
+def cli_post_pr_comment(
+    github_token: Optional[str],
+    repo: str,
+    pr_number: int,
+    comment_body: str,
+    comment_id: Optional[str] = None,
 ):
     """Post or update a comment on a pull request."""
-    try:
-        github = get_github_client(github_token)
+    from commands import post_pr_comment
 
-        for comment_id in comment_id.split(","):
-            result = post_pr_comment(
-                github, repo, pr_number, comment_body, comment_id)
-            typer.echo(result)
-    except Exception as e:
-        typer.echo(f"Error: {e}", err=True)
-        raise typer.Exit(code=1)
+    github = get_github_client(github_token)
 
+    comment_ids = comment_id.split(",") if comment_id else [None]
+    for comment_id in comment_ids:
+        result = post_pr_comment(
+            github, repo, pr_number, comment_body,
+            int(comment_id) if comment_id else None)
+        print(result)
 
-@app.command("delete-pr-comment")
-def cli_delete_pr_comment(
-    github_token: Optional[str] = typer.Option(
-        None, help="GitHub token with permissions to create issues."),
-
-    repo: str = typer.Option(...,
-                             help="GitHub repository in the format 'owner/repo'."),
-    pr_number: int = typer.Option(..., help="Pull request number."),
-    comment_id: str = typer.Option(
-        None,
+
+@command(
+    "delete-pr-comment",
+    GITHUB_TOKEN_OPTION,
+    REPO_OPTION,
+    PR_NUMBER_OPTION,
+    option(
         "--comment-id",
         help="ID of the comment to delete. Can be multiple IDs separated by commas."
     ),
+)
+@cli_errors
+def cli_delete_pr_comment(
+    github_token: Optional[str],
+    repo: str,
+    pr_number: int,
+    comment_id: str = None,
 ):
     """Delete a comment with provided comment id on a pull request."""
-    try:
-        github = get_github_client(github_token)
-
-        result = delete_pr_comment(
-            github, repo, pr_number, comment_id)
-        typer.echo(result)
-    except Exception as e:
-        typer.echo(f"Error: {e}", err=True)
-        raise typer.Exit(code=1)
-
-
-@app.command("process-stale-issues")
+    from commands import delete_pr_comment
+
+    github = get_github_client(github_token)
+
+    result = delete_pr_comment(
+        github, repo, pr_number, comment_id)
+    print(result)
+
+
+@command(
+    "process-stale-issues",
+    GITHUB_TOKEN_OPTION,
+    REPO_OPTION,
+    option("--stale-issue-label", default="S-stale",
+           help="Label to mark stale issues."),
+    option("--days-before-stale", type=int, default=999,
+           help="Number of days before an issue is considered stale."),
+    option("--days-before-close", type=int, default=5,
+           help="Number of days before a stale issue is closed."),
+    MAX_WORKERS_OPTION,
+    option("--etag-cache",
+           help="File keeping issue-listing ETags between runs, so unchanged pages cost no rate limit."),
+)
+@cli_errors
 def cli_process_issues(
-    github_token: Optional[str] = typer.Option(
-        None, help="GitHub token with permissions to create issues."),
-
-    repo: str = typer.Option(...,
-                             help="GitHub repository in the format 'owner/repo'."),
-    stale_issue_label: str = typer.Option(
-        "S-stale", help="Label to mark stale issues."),
-    days_before_stale: int = typer.Option(
-        999, help="Number of days before an issue is considered stale."),
-    days_before_close: int = typer.Option(
-        5, help="Number of days before a stale issue is closed."),
+    github_token: Optional[str],
+    repo: str,
+    stale_issue_label: str = "S-stale",
+    days_before_stale: int = 999,
+    days_before_close: int = 5,
+    max_workers: int = 1,
+    etag_cache: Optional[str] = None,
 ):
     """Process stale issues."""
-    try:
-        github = get_github_client(github_token)
-
-        process_issues(
-            github,
-            repo,
-            stale_issue_label,
-            days_before_stale,
-            days_before_close,
-        )
-        typer.echo("Stale issue check completed successfully.")
-    except Exception as e:
-        typer.echo(f"Error: {e}", err=True)
-        raise typer.Exit(code=1)
-
-
-@app.command("process-stale-prs")
+    from commands import process_issues
+
+    github = get_github_client(github_token, BULK_MIN_RATE_LIMIT)
+
+    process_issues(
+        github,
+        repo,
+        stale_issue_label,
+        days_before_stale,
+        days_before_close,
+        max_workers,
+        etag_cache,
+    )
+    print("Stale issue check completed successfully.")
+
+
+DEFAULT_STALE_PR_MESSAGE = "This PR is stale because it has been open 14 days with no activity. Remove stale label or comment or this will be closed in 5 days."
+
+
+@command(
+    "process-stale-prs",
+    GITHUB_TOKEN_OPTION,
+    REPO_OPTION,
+    option("--stale-pr-message", default=DEFAULT_STALE_PR_MESSAGE,
+           help="Message to post on stale PRs."),
+    option("--stale-issue-label", default="S-stale",
+           help="Label to mark stale PRs."),
+    option("--exempt-labels", default="S-exempt-stale",
+           help="Comma-separated exempt labels."),
+    option("--days-before-stale", type=int, default=14,
+           help="Number of days before a PR is considered stale."),
+    option("--days-before-close", type=int, default=5,
+           help="Number of days before a stale PR is closed."),
+    MAX_WORKERS_OPTION,
+)
+@cli_errors
 def cli_process_pull_requests(
-    github_token: Optional[str] = typer.Option(
-        None, help="GitHub token with permissions to create issues."),
-
-    repo: str = typer.Option(...,
-                             help="GitHub repository in the format 'owner/repo'."),
-    stale_pr_message: str = typer.Option(
-        "This PR is stale because it has been open 14 days with no activity. Remove stale label or comment or this will be closed in 5 days.",
-        help="Message to post on stale PRs."
-    ),
-    stale_issue_label: str = typer.Option(
-        "S-stale", help="Label to mark stale PRs."),
-    exempt_labels: str = typer.Option(
-        "S-exempt-stale", help="Comma-separated exempt labels."),
-    days_before_stale: int = typer.Option(
-        14, help="Number of days before a PR is considered stale."),
-    days_before_close: int = typer.Option(
-        5, help="Number of days before a stale PR is closed."),
+    github_token: Optional[str],
+    repo: str,
+    stale_pr_message: str = DEFAULT_STALE_PR_MESSAGE,
+    stale_issue_label: str = "S-stale",
+    exempt_labels: str = "S-exempt-stale",
+    days_before_stale: int = 14,
+    days_before_close: int = 5,
+    max_workers: int = 1,
 ):
     """Process stale pull requests."""
-    try:
-        github = get_github_client(github_token)
-
-        process_pull_requests(
-            github,
-            repo,
-            stale_pr_message,
-            stale_issue_label,
-            exempt_labels.split(","),
-            days_before_stale,
-            days_before_close,
-        )
-        typer.echo("Stale PR check completed successfully.")
-    except Exception as e:
-        typer.echo(f"Error: {e}", err=True)
-        raise typer.Exit(code=1)
-
-
-@app.command("get-pr-comments")
+    from commands import process_pull_requests
+
+    github = get_github_client(github_token, BULK_MIN_RATE_LIMIT, "graphql")
+
+    process_pull_requests(
+        github,
+        repo,
+        stale_pr_message,
+        stale_issue_label,
+        exempt_labels.split(","),
+        days_before_stale,
+        days_before_close,
+        max_workers,
+    )
+    print("Stale PR check completed successfully.")
+
+
+@command(
+    "get-pr-comments",
+    GITHUB_TOKEN_OPTION,
+    REPO_OPTION,
+    PR_NUMBER_OPTION,
+    option("--message-substring", help="Substring to search in comments."),
+    option("--user-type",
+           help="User type to filter comments. Can be 'User' or 'Bot'."),
+)
+@cli_errors
 def cli_get_pr_comments(
-    github_token: Optional[str] = typer.Option(
-        None, help="GitHub token with permissions to create issues."),
-
-    repo: str = typer.Option(...,
-                             help="GitHub repository in the format 'owner/repo'."),
-    pr_number: int = typer.Option(..., help="Pull request number."),
-    message_substring: Optional[str] = typer.Option(
-        None, help="Substring to search in comments."),
-    user_type: Optional[str] = typer.Option(
-        None, help="User type to filter comments. Can be 'User' or 'Bot'."),
+    github_token: Optional[str],
+    repo: str,
+    pr_number: int,
+    message_substring: Optional[str] = None,
+    user_type: Optional[str] = None,
 ):
-    try:
-        github = get_github_client(github_token)
+    from commands import get_comments_ids
 
-        comment_ids = get_comments_ids(
-            github, repo, pr_number, message_substring, user_type)
-        typer.echo(",".join(map(str, comment_ids)))
-    except Exception as e:
-        typer.echo(f"Error: {e}", err=True)
-        raise typer.Exit(code=1)
+    github = get_github_client(github_token, BULK_MIN_RATE_LIMIT, "graphql")
 
+    comment_ids = get_comments_ids(
+        github, repo, pr_number, message_substring, user_type)
+    # Join only once every page is fetched, so a failed request prints no
+    # partial list before its error
+    print(",".join(comment_ids))
 
-@app.command("get-pr-base-sha")
-def cli_get_pr_base_sha(
-    github_token: Optional[str] = typer.Option(
-        None, help="GitHub token with permissions to create issues."),
 
-    repo: str = typer.Option(...,
-                             help="GitHub repository in the format 'owner/repo'."),
-    pr_number: int = typer.Option(..., help="Pull request number."),
+@command(
+    "get-pr-base-sha",
+    GITHUB_TOKEN_OPTION,
+    REPO_OPTION,
+    PR_NUMBER_OPTION,
+)
+@cli_errors
+def cli_get_pr_base_sha(
+    github_token: Optional[str],
+    repo: str,
+    pr_number: int,
 ):
     """
     Get the base commit SHA of a pull request.
     """
-    try:
-        github = get_github_client(github_token)
+    from commands import get_pr_base_sha
+
+    github = get_github_client(github_token)
+
+    base_sha = get_pr_base_sha(github, repo, pr_number)
+    print(f"{base_sha}")
+
 
-        base_sha = get_pr_base_sha(github, repo, pr_number)
-        typer.echo(f"{base_sha}")
-    except Exception as e:
-        typer.echo(f"Error: {e}", err=True)
-        raise typer.Exit(code=1)
+def main() -> None:
+    """Parse the command line and run the selected command."""
+    arguments = vars(parser.parse_args())
+    COMMANDS[arguments.pop("command")](**arguments)
 
 
 if __name__ == "__main__":
-    app()
+    main()